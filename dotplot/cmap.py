@@ -1,5 +1,3 @@
-import matplotlib as mpl
-
-
 def get_colormap(color_list: list, segment=1000):
+    import matplotlib as mpl
     return mpl.colors.LinearSegmentedColormap.from_list('color_list', color_list, N=segment)
@@ -1,15 +1,27 @@
 import math
 from os import PathLike
-from typing import Union, Sequence, Callable
+from typing import TYPE_CHECKING, Union, Sequence, Callable
 
-import matplotlib as mpl
 import numpy as np
 import pandas as pd
-from matplotlib import gridspec
-from matplotlib import pyplot as plt
 
-mpl.rcParams['pdf.fonttype'] = 42
-mpl.rcParams["font.sans-serif"] = "Arial"
+if TYPE_CHECKING:
+    import matplotlib as mpl
+
+try:
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def _fill_scatter_buffers(size_values, size_factor, coords, values):
+        height, width = size_values.shape
+        for i in numba.prange(height):
+            for j in range(width):
+                k = i * width + j
+                coords[k, 0] = j + 1
+                coords[k, 1] = i + 1
+                values[k, 0] = size_values[i, j] * size_factor
+except ImportError:
+    _fill_scatter_buffers = None
 
 
 class DotPlot(object):
@@ -18,6 +30,12 @@ class DotPlot(object):
     DEFAULT_LEGENDS_WIDTH = .45
     MIN_FIGURE_HEIGHT = 3
     DEFAULT_BAND_ITEM_LENGTH = DEFAULT_ITEM_HEIGHT
+    _style_applied = False
+
+    __slots__ = ('size_data', 'color_data', 'circle_data', 'annotation_data',
+                 'height_item', 'width_item',
+                 'resized_size_values', 'resized_circle_values',
+                 '_col_labels', '_row_labels')
 
     def __init__(self, df_size: pd.DataFrame,
                  df_color: Union[pd.DataFrame, None] = None,
@@ -30,10 +48,6 @@ class DotPlot(object):
         :param df_size: the DataFrame object represents the scatter size in dotplot
         :param df_color: the DataFrame object represents the color in dotplot
         """
-        __slots__ = ['size_data', 'resized_size_data',
-                     'color_data', 'height_item', 'width_item',
-                     'circle_data', 'resized_circle_data', 'annotation_data'
-                     ]
         if df_color is not None and df_size.shape != df_color.shape:
             raise ValueError('df_size and df_color should have the same dimension')
         if df_circle is not None and df_size.shape != df_circle.shape:
@@ -46,11 +60,17 @@ class DotPlot(object):
         self.circle_data = df_circle
         self.height_item, self.width_item = df_size.shape
         self.annotation_data = df_annotation
-        self.resized_size_data: Union[pd.DataFrame, None] = None
-        self.resized_circle_data: Union[pd.DataFrame, None] = None
+        self._col_labels = df_size.columns.tolist()
+        self._row_labels = df_size.index.tolist()
+        self.resized_size_values: Union[np.ndarray, None] = None
+        self.resized_circle_values: Union[np.ndarray, None] = None
 
     def __get_figure(self):
-        _text_max = math.ceil(self.size_data.index.map(len).max() / 15)
+        import matplotlib as mpl
+        from matplotlib import gridspec
+        from matplotlib import pyplot as plt
+
+        _text_max = math.ceil(self.size_data.index.str.len().max() / 15)
         mainplot_height = self.height_item * self.DEFAULT_ITEM_HEIGHT
         mainplot_width = (
                 (_text_max + self.width_item) * self.DEFAULT_ITEM_WIDTH
@@ -60,7 +80,14 @@ class DotPlot(object):
 
         figure_height = max([self.MIN_FIGURE_HEIGHT, mainplot_height])
         figure_width = mainplot_width + self.DEFAULT_LEGENDS_WIDTH
-        plt.style.use('seaborn-white')
+        if not DotPlot._style_applied:
+            mpl.rcParams['pdf.fonttype'] = 42
+            mpl.rcParams["font.sans-serif"] = "Arial"
+            try:
+                plt.style.use('seaborn-white')
+            except OSError:  # style renamed in matplotlib>=3.6
+                plt.style.use('seaborn-v0_8-white')
+            DotPlot._style_applied = True
         fig = plt.figure(figsize=(figure_width, figure_height))
         gs = gridspec.GridSpec(nrows=3, ncols=2, wspace=0.15, hspace=0.15,
                                width_ratios=[mainplot_width, self.DEFAULT_LEGENDS_WIDTH])
@@ -95,90 +122,126 @@ class DotPlot(object):
         :return:
         """
         keys = [v for v in [item_key, group_key, sizes_key, color_key, circle_key] if v is not None]
-        data_frame = data_frame[keys]
-        _original_item_order = data_frame[item_key].tolist()
-        _original_item_order = _original_item_order[::-1]
+        data_frame = data_frame.loc[:, keys].copy()
+        _original_item_order = pd.unique(data_frame[item_key].values)[::-1]
         if sizes_func is not None:
-            data_frame[sizes_key] = data_frame[sizes_key].map(sizes_func)
+            data_frame[sizes_key] = np.vectorize(sizes_func)(data_frame[sizes_key].to_numpy())
         if color_func is not None:
-            data_frame[color_key] = data_frame[color_key].map(color_func)
-        keys.remove(item_key)
-        keys.remove(group_key)
-        data_frame = data_frame.pivot(index=item_key, columns=group_key, values=keys)
-        data_frame = data_frame.loc[_original_item_order, :]
-        if selected_item is not None:
-            data_frame = data_frame.loc[selected_item, :]
-        if selected_group is not None:
-            data_frame = data_frame.loc[:, selected_group]
-        data_frame.columns = data_frame.columns.map(lambda x: '_'.join(x))
-        data_frame = data_frame.fillna(0)
-
-        sizes_df, color_df, circle_df = None, None, None
-        sizes_df = data_frame.loc[:, data_frame.columns.str.startswith(sizes_key)]
+            data_frame[color_key] = np.vectorize(color_func)(data_frame[color_key].to_numpy())
+        sizes_df = data_frame.pivot_table(index=item_key, columns=group_key, values=sizes_key,
+                                          fill_value=0, aggfunc='first')
+        color_df, circle_df = None, None
         if color_key is not None:
-            color_df = data_frame.loc[:, data_frame.columns.str.startswith(color_key)]
+            color_df = data_frame.pivot_table(index=item_key, columns=group_key, values=color_key,
+                                              fill_value=0, aggfunc='first')
         if circle_key is not None:
-            circle_df = data_frame.loc[:, data_frame.columns.str.startswith(circle_key)]
-        return cls(sizes_df, color_df, circle_df)
+            circle_df = data_frame.pivot_table(index=item_key, columns=group_key, values=circle_key,
+                                               fill_value=0, aggfunc='first')
+
+        _index = selected_item if selected_item is not None else _original_item_order
+        _columns = selected_group if selected_group is not None else sizes_df.columns
+        sizes_df = sizes_df.reindex(index=_index, columns=_columns, fill_value=0)
+        if color_df is not None:
+            color_df = color_df.reindex(index=_index, columns=_columns, fill_value=0)
+        if circle_df is not None:
+            circle_df = circle_df.reindex(index=_index, columns=_columns, fill_value=0)
+        return cls(df_size=sizes_df, df_color=color_df, df_circle=circle_df)
 
-    def __get_coordinates(self, size_factor):
-        X = list(range(1, self.width_item + 1)) * self.height_item
-        Y = sorted(list(range(1, self.height_item + 1)) * self.width_item)
-        self.resized_size_data = self.size_data.applymap(func=lambda x: x * size_factor)
+    def __build_scatter_buffers(self, size_factor):
+        """Pack coordinates and per-point size/color into two contiguous (N, 2) buffers."""
+        n_points = self.height_item * self.width_item
+        coords = np.empty((n_points, 2), dtype=np.float64)
+        values = np.empty((n_points, 2), dtype=np.float64)
+        if _fill_scatter_buffers is not None:
+            _fill_scatter_buffers(self.size_data.to_numpy(), float(size_factor), coords, values)
+        else:
+            coords[:, 0] = np.tile(np.arange(1, self.width_item + 1), self.height_item)
+            coords[:, 1] = np.repeat(np.arange(1, self.height_item + 1), self.width_item)
+            np.multiply(self.size_data.to_numpy().ravel(), size_factor, out=values[:, 0])
+        values[:, 1] = 0 if self.color_data is None else self.color_data.to_numpy().ravel()
+        self.resized_size_values = values[:, 0]
         if self.circle_data is not None:
-            self.resized_circle_data = self.circle_data.applymap(func=lambda x: x * size_factor)
-        return X, Y
+            self.resized_circle_values = self.circle_data.to_numpy().ravel() * size_factor
+        return coords, values
 
     def __draw_dotplot(self, ax, size_factor, cmap, vmin, vmax):
-        X, Y = self.__get_coordinates(size_factor)
+        from matplotlib.collections import CircleCollection
+
+        coords, values = self.__build_scatter_buffers(size_factor)
+        X, Y = coords[:, 0], coords[:, 1]
+        sizes = values[:, 0]
+        sct = CircleCollection(sizes=sizes, offsets=coords, offset_transform=ax.transData)
         if self.color_data is None:
-            sct = ax.scatter(X, Y, c='r', cmap=cmap, s=self.resized_size_data.values.flatten(),
-                             edgecolors='none', linewidths=0, vmin=vmin, vmax=vmax)
+            sct.set_facecolor('r')
         else:
-            sct = ax.scatter(X, Y, c=self.color_data.values.flatten(), s=self.resized_size_data.values.flatten(),
-                             edgecolors='none', linewidths=0, vmin=vmin, vmax=vmax, cmap=cmap)
+            sct.set_array(values[:, 1])
+            sct.set_cmap(cmap)
+            sct.set_clim(vmin, vmax)
+        sct.set_edgecolor('none')
+        sct.set_linewidth(0)
+        ax.add_collection(sct)
+        sct.set_rasterized(True)
         sct_circle = None
         if self.circle_data is not None:
-            sct_circle = ax.scatter(X, Y, c='', edgecolors='k', marker='o', linestyle='--',
-                                    s=self.resized_circle_data.values.flatten())
+            sct_circle = ax.scatter(X, Y, facecolors='none', edgecolors='k', marker='o', linestyle='--',
+                                    s=self.resized_circle_values)
+            sct_circle.set_rasterized(True)
         width, height = self.width_item, self.height_item
         ax.set_xlim([0.5, width + 0.5])
         ax.set_ylim([0.6, height + 0.6])
         ax.set_xticks(range(1, width + 1))
         ax.set_yticks(range(1, height + 1))
-        ax.set_xticklabels(self.size_data.columns.tolist(), rotation='vertical')
-        ax.set_yticklabels(self.size_data.index.tolist())
+        ax.set_xticklabels(self._col_labels, rotation='vertical')
+        ax.set_yticklabels(self._row_labels)
         ax.tick_params(axis='y', length=5, labelsize=15, direction='out')
         ax.tick_params(axis='x', length=5, labelsize=15, direction='out')
         return sct, sct_circle
 
     @staticmethod
-    def __draw_color_bar(ax, sct: mpl.collections.PathCollection, cmap, vmin, vmax):
-        gradient = np.linspace(1, 0, 500)
+    def __draw_color_bar(ax, sct: 'mpl.collections.PathCollection', cmap, vmin, vmax):
+        gradient = np.linspace(1, 0, 256)
         gradient = gradient[:, np.newaxis]
-        _ = ax.imshow(gradient, aspect='auto', cmap=cmap, origin='upper', extent=[.2, 0.3, 0.5, -0.5])
+        im = ax.imshow(gradient, aspect='auto', cmap=cmap, origin='upper',
+                       extent=[.2, 0.3, 0.5, -0.5], interpolation='nearest')
+        im.set_rasterized(True)
         ax.set_xticks([])
-        ax.set_yticks([])
-        ax_cbar2 = ax.twinx()
-        _ = ax_cbar2.set_yticks([0, 1000])
-        if vmax is None:
-            vmax = math.ceil(sct.get_array().max())
-        if vmin is None:
-            vmin = math.floor(sct.get_array().min())
-        _ = ax_cbar2.set_yticklabels([vmin, vmax])
-        _ = ax_cbar2.set_ylabel('-log10(pvalue)')
+        if vmax is None or vmin is None:
+            arr = sct.get_array()
+            if vmax is None:
+                vmax = int(np.ceil(arr.max()))
+            if vmin is None:
+                vmin = int(np.floor(arr.min()))
+        ax.set_yticks([0.5, -0.5])
+        ax.set_yticklabels([vmin, vmax])
+        ax.yaxis.tick_right()
+        ax.yaxis.set_label_position('right')
+        ax.set_ylabel('-log10(pvalue)')
+
+    @staticmethod
+    def __size_legend_elements(sct, size_factor, color):
+        from matplotlib import ticker
+        from matplotlib.lines import Line2D
+        data = np.asarray(sct.get_sizes()) / size_factor
+        values = ticker.MaxNLocator(nbins=9, min_n_ticks=3).tick_values(data.min(), data.max())
+        values = values[(values >= data.min()) & (values <= data.max())]
+        handles = [Line2D([0], [0], ls='', marker='o', color=color,
+                          markersize=np.sqrt(v * size_factor)) for v in values]
+        labels = ['%g' % v for v in values]
+        return handles, labels
 
     @staticmethod
-    def __draw_legend(ax, sct: mpl.collections.PathCollection, size_factor, title, circle=False, color=None):
-        handles, labels = sct.legend_elements(prop="sizes", alpha=1,
-                                              func=lambda x: x / size_factor,
-                                              color=color
-                                              )
+    def __draw_legend(ax, sct: 'mpl.collections.Collection', size_factor, title, circle=False, color=None):
+        if hasattr(sct, 'legend_elements'):
+            handles, labels = sct.legend_elements(prop="sizes", alpha=1,
+                                                  func=lambda x: x / size_factor,
+                                                  color=color
+                                                  )
+        else:
+            handles, labels = DotPlot.__size_legend_elements(sct, size_factor, color)
         if len(handles) > 3:
-            handles = np.asarray(handles)
-            labels = np.asarray(labels)
-            handles = handles[[0, math.ceil(len(handles) / 2), -1]]
-            labels = labels[[0, math.ceil(len(labels) / 2), -1]]
+            mid = math.ceil(len(handles) / 2)
+            handles = [handles[0], handles[mid], handles[-1]]
+            labels = [labels[0], labels[mid], labels[-1]]
         if circle:
             from matplotlib.lines import Line2D
             for i, _item in enumerate(handles):
@@ -197,7 +260,7 @@ class DotPlot(object):
     def plot(self, size_factor: float = 15,
              vmin: float = 0, vmax: float = None,
              path: Union[PathLike, None] = None,
-             cmap: Union[str, mpl.colors.Colormap] = 'Reds'):
+             cmap: Union[str, 'mpl.colors.Colormap'] = 'Reds'):
         """
 
         :param size_factor: `size factor` * `value` for the actually representation of scatter size in the final figure
@@ -214,7 +277,10 @@ class DotPlot(object):
             self.__draw_legend(ax_circles, sct_circle, size_factor, title='Circles', circle=True, color='k')
         else:
             ax_circles.axis('off')
-        self.__draw_color_bar(ax_cbar, scatter, cmap, vmin, vmax)
+        if self.color_data is not None:
+            self.__draw_color_bar(ax_cbar, scatter, cmap, vmin, vmax)
+        else:
+            ax_cbar.axis('off')
         if path:
             fig.savefig(path, dpi=300, bbox_inches='tight')  #
         return scatter